@@ -1,13 +1,29 @@
+import argparse
 from pathlib import Path
 
 from ocr2pdf.ocr2pdf import ocr2pdf
 
 
-def main(images: list[str], pdf: str):
-    ocr2pdf([Path(_) for _ in images], Path(pdf))
+def main(images: list[str], pdf: str, jobs: int = 1):
+    ocr2pdf([Path(_) for _ in images], Path(pdf), jobs)
 
 
 if __name__ == "__main__":
-    import fire
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--images",
+        nargs="+",
+        required=True,
+        help="input .png images, each with a .ms.json OCR result next to it",
+    )
+    parser.add_argument("--pdf", required=True, help="output .pdf")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="worker processes, 0 for one per CPU",
+    )
+    args = parser.parse_args()
 
-    fire.Fire(main)
+    main(args.images, args.pdf, args.jobs)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import json
+import unittest
+from typing import Iterable
+
+import numpy as np
+
+from .geometry import Rect
+
+try:
+    from numba import njit
+except ImportError:
+
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+
+        return decorator
+
+
+def rect_columns(
+    rects: Iterable[Rect],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack rects into contiguous int32 x0, y0, x1, y1 coordinate columns.
+    """
+    boxes = np.array([tuple(rect) for rect in rects], dtype=np.int32).reshape(-1, 4)
+    x0, y0, x1, y1 = np.ascontiguousarray(boxes.T)
+    return x0, y0, x1, y1
+
+
+@njit(cache=True)
+def rects_intersect(ax0, ay0, ax1, ay1, bx0, by0, bx1, by1):
+    """
+    (N, M) mask of `Rect.intersects` between N rects a and M rects b.
+    """
+    return (
+        (ax0[:, None] < bx1[None, :])
+        & (ax1[:, None] > bx0[None, :])
+        & (ay0[:, None] < by1[None, :])
+        & (ay1[:, None] > by0[None, :])
+    )
+
+
+@njit(cache=True)
+def rects_contain(ax0, ay0, ax1, ay1, bx0, by0, bx1, by1):
+    """
+    (N, M) mask of `Rect.contains` between N rects a and M non-empty rects b.
+    """
+    return (
+        (ax0[:, None] <= bx0[None, :])
+        & (ay0[:, None] <= by0[None, :])
+        & (bx1[None, :] <= ax1[:, None])
+        & (by1[None, :] <= ay1[:, None])
+    )
+
+
+@njit(cache=True)
+def spans_intersect(a_starts, a_ends, b_starts, b_ends):
+    """
+    (N, M) mask of `Vector1D.intersects` between N spans a and M spans b.
+    """
+    return (a_starts[:, None] < b_ends[None, :]) & (a_ends[:, None] > b_starts[None, :])
+
+
+def overlapping_spans(starts: Iterable[int], ends: Iterable[int]) -> np.ndarray:
+    """
+    (K, 2) index pairs i < j of the spans that intersect each other, e.g. the
+    y-spans of lines that share a row, as given by `Page.line_coords`.
+    """
+    starts = np.asarray(starts, dtype=np.int32)
+    ends = np.asarray(ends, dtype=np.int32)
+    mask = spans_intersect(starts, ends, starts, ends)
+    return np.argwhere(np.triu(mask, 1))
+
+
+class TestGeomKernels(unittest.TestCase):
+    # overlapping, touching an edge, nested, and disjoint rects
+    RECTS = [
+        Rect(0, 0, 10, 10),
+        Rect(10, 0, 20, 10),
+        Rect(0, 10, 10, 20),
+        Rect(2, 2, 8, 8),
+        Rect(5, 5, 15, 15),
+        Rect(30, 30, 40, 40),
+    ]
+
+    def test_rects_intersect(self):
+        cols = rect_columns(self.RECTS)
+        mask = rects_intersect(*cols, *cols)
+        expected = [[a.intersects(b) for b in self.RECTS] for a in self.RECTS]
+        self.assertEqual(mask.tolist(), expected)
+
+    def test_rects_contain(self):
+        cols = rect_columns(self.RECTS)
+        mask = rects_contain(*cols, *cols)
+        expected = [[a.contains(b) for b in self.RECTS] for a in self.RECTS]
+        self.assertEqual(mask.tolist(), expected)
+
+    def test_overlapping_spans(self):
+        from ..ocr.ms.page import Page
+
+        def line(y0, y1):
+            quad = [
+                {"x": 0, "y": y0},
+                {"x": 10, "y": y0},
+                {"x": 10, "y": y1},
+                {"x": 0, "y": y1},
+            ]
+            return {"text": "", "boundingPolygon": quad, "words": []}
+
+        # lines 0 and 1 share a row, line 2 only touches line 1
+        lines = [line(0, 10), line(5, 15), line(15, 25)]
+        page = Page.loads(json.dumps([{"lines": lines}]))[0]
+        pairs = overlapping_spans(page.line_coords[1], page.line_coords[3])
+        self.assertEqual(pairs.tolist(), [[0, 1]])
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import copy
 import math
-from dataclasses import dataclass, field
+import unittest
+from dataclasses import FrozenInstanceError
 from typing import Iterator
 
 
@@ -57,7 +59,7 @@ class Vector2D:
 
     @property
     def length(self) -> float:
-        return math.sqrt(self.delta_x**2 + self.delta_y**2)
+        return math.hypot(self.end.x - self.start.x, self.end.y - self.start.y)
 
     def copy(self) -> Vector2D:
         return Vector2D(self.start.copy(), self.end.copy())
@@ -78,26 +80,25 @@ class Vector2D:
         return f"Vector2D({self.start}, {self.end})"
 
 
-@dataclass(unsafe_hash=True, frozen=True)
 class Point:
-    x: int
-    y: int
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
 
     def copy(self) -> Point:
         return Point(self.x, self.y)
 
+    @property
+    def as_tuple(self) -> tuple[int, int]:
+        return (self.x, self.y)
+
     def __iter__(self) -> Iterator[int]:
-        yield self.x
-        yield self.y
+        return iter((self.x, self.y))
 
     def __getitem__(self, index: int) -> int:
-        match index:
-            case 0:
-                return self.x
-            case 1:
-                return self.y
-            case _:
-                raise IndexError(f"Point index out of range: {index}")
+        return (self.x, self.y)[index]
 
     def __len__(self) -> int:
         return 2
@@ -105,13 +106,36 @@ class Point:
     def __repr__(self) -> str:
         return f"Point({self.x}, {self.y})"
 
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Point):
+            return False
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
+
 
-@dataclass(unsafe_hash=True, frozen=True)
 class Rect:
-    x0: int = field(default=0)
-    y0: int = field(default=0)
-    x1: int = field(default=0)
-    y1: int = field(default=0)
+    __slots__ = ("x0", "y0", "x1", "y1", "w", "h", "_p0", "_p1", "_center")
+
+    def __init__(self, x0: int = 0, y0: int = 0, x1: int = 0, y1: int = 0):
+        # Rects are immutable, which is what keeps w/h and the cached points valid
+        setattr_ = object.__setattr__
+        setattr_(self, "x0", x0)
+        setattr_(self, "y0", y0)
+        setattr_(self, "x1", x1)
+        setattr_(self, "y1", y1)
+        setattr_(self, "w", x1 - x0)
+        setattr_(self, "h", y1 - y0)
+
+    def __setattr__(self, name: str, value) -> None:
+        raise FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def __reduce__(self):
+        return Rect, (self.x0, self.y0, self.x1, self.y1)
 
     @classmethod
     def from_cv(cls, img) -> Rect: # img: MatLike
@@ -132,23 +156,30 @@ class Rect:
 
     @property
     def p0(self) -> Point:
-        return Point(self.x0, self.y0)
+        try:
+            return self._p0
+        except AttributeError:
+            p0 = Point(self.x0, self.y0)
+            object.__setattr__(self, "_p0", p0)
+            return p0
 
     @property
     def p1(self) -> Point:
-        return Point(self.x1, self.y1)
-
-    @property
-    def w(self):
-        return self.x1 - self.x0
-
-    @property
-    def h(self):
-        return self.y1 - self.y0
+        try:
+            return self._p1
+        except AttributeError:
+            p1 = Point(self.x1, self.y1)
+            object.__setattr__(self, "_p1", p1)
+            return p1
 
     @property
     def center(self) -> Point:
-        return Point(self.center_x, self.center_y)
+        try:
+            return self._center
+        except AttributeError:
+            center = Point(self.center_x, self.center_y)
+            object.__setattr__(self, "_center", center)
+            return center
 
     @property
     def center_x(self) -> int:
@@ -173,6 +204,8 @@ class Rect:
             x0 = self.x0
         if y0 is None:
             y0 = self.y0
+        if x0 == self.x0 and y0 == self.y0:
+            return self
         return Rect(x0, y0, x0 + self.w, y0 + self.h)
 
     def move(self, dx: int | None = None, dy: int | None = None) -> Rect:
@@ -180,6 +213,8 @@ class Rect:
             dx = 0
         if dy is None:
             dy = 0
+        if dx == 0 and dy == 0:
+            return self
         return Rect(self.x0 + dx, self.y0 + dy, self.x1 + dx, self.y1 + dy)
 
     def with_x0(self, x0: int) -> Rect:
@@ -210,12 +245,16 @@ class Rect:
         return Rect(self.x0, self.y0, p1.x, p1.y)
 
     def expand(self, dx0: int = 0, dy0: int = 0, dx1: int = 0, dy1: int = 0) -> Rect:
+        if dx0 == 0 and dy0 == 0 and dx1 == 0 and dy1 == 0:
+            return self
         return Rect(self.x0 - dx0, self.y0 - dy0, self.x1 + dx1, self.y1 + dy1)
 
     def shrink(self, dx0: int = 0, dy0: int = 0, dx1: int = 0, dy1: int = 0) -> Rect:
         return self.expand(-dx0, -dy0, -dx1, -dy1)
 
     def relative_to(self, other: Rect) -> Rect:
+        if other.x0 == 0 and other.y0 == 0:
+            return self
         return Rect(
             self.x0 - other.x0,
             self.y0 - other.y0,
@@ -224,6 +263,8 @@ class Rect:
         )
 
     def relative_to_point(self, other: Point) -> Rect:
+        if other.x == 0 and other.y == 0:
+            return self
         return Rect(
             self.x0 - other.x,
             self.y0 - other.y,
@@ -292,21 +333,18 @@ class Rect:
         )
 
     def equals(self, other: Rect) -> bool:
-        return (
-            self.x0 == other.x0
-            and self.y0 == other.y0
-            and self.x1 == other.x1
-            and self.y1 == other.y1
+        return (self.x0, self.y0, self.x1, self.y1) == (
+            other.x0,
+            other.y0,
+            other.x1,
+            other.y1,
         )
 
     def equals_tuple(self, other: tuple[int, int, int, int]) -> bool:
-        return self.equals(Rect(*other))
+        return (self.x0, self.y0, self.x1, self.y1) == tuple(other)
 
     def __iter__(self) -> Iterator[int]:
-        yield self.x0
-        yield self.y0
-        yield self.x1
-        yield self.y1
+        return iter((self.x0, self.y0, self.x1, self.y1))
 
     def __len__(self) -> int:
         return 4
@@ -317,7 +355,7 @@ class Rect:
         )
 
     def __contains__(self, other: Rect) -> bool:
-        return self.equals(other)
+        return self.contains(other)
 
     def __and__(self, other: Rect) -> Rect:
         return self.intersect(other)
@@ -326,19 +364,31 @@ class Rect:
         return self.union(other)
 
     def __getitem__(self, index: int) -> int:
-        match index:
-            case 0:
-                return self.x0
-            case 1:
-                return self.y0
-            case 2:
-                return self.x1
-            case 3:
-                return self.y1
-            case _:
-                raise IndexError(f"Rect index out of range: {index}")
+        return (self.x0, self.y0, self.x1, self.y1)[index]
 
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Rect):
             return False
         return self.equals(other)
+
+    def __hash__(self) -> int:
+        return hash((self.x0, self.y0, self.x1, self.y1))
+
+
+class TestRect(unittest.TestCase):
+    def test_contains(self):
+        outer = Rect(0, 0, 100, 50)
+        inner = Rect(10, 10, 20, 20)
+        self.assertTrue(inner in outer)
+        self.assertFalse(outer in inner)
+        self.assertTrue(outer in outer)
+
+    def test_frozen(self):
+        rect = Rect(1, 2, 5, 9)
+        self.assertEqual(rect.p1, Point(5, 9))
+        with self.assertRaises(FrozenInstanceError):
+            rect.x1 = 100
+        with self.assertRaises(FrozenInstanceError):
+            del rect.w
+        self.assertEqual((rect.x1, rect.w, rect.p1), (5, 4, Point(5, 9)))
+        self.assertEqual(copy.copy(rect), rect)
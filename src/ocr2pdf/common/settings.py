@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from pathlib import Path
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Settings:
     """
     Arguments for the program.
@@ -29,9 +29,12 @@ class Settings:
     dump_edit_words_in_paragraph: bool = False
 
     def __post_init__(self):
-        self.input_img_path = Path(self.input_img_path)
-        self.output_img_path = Path(self.output_img_path)
-        self.dump = Path(self.dump) if self.dump is not None else None
+        if not isinstance(self.input_img_path, Path):
+            object.__setattr__(self, "input_img_path", Path(self.input_img_path))
+        if not isinstance(self.output_img_path, Path):
+            object.__setattr__(self, "output_img_path", Path(self.output_img_path))
+        if self.dump is not None and not isinstance(self.dump, Path):
+            object.__setattr__(self, "dump", Path(self.dump))
 
 
 # 单例模式实现，保持向后兼容
@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from typing import overload
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, overload
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 @overload
@@ -13,3 +18,30 @@ def clamp(x: float, lb: float, ub: float) -> float: ...
 
 def clamp(x: int | float, lb: int | float, ub: int | float) -> int | float:
     return max(lb, min(x, ub))
+
+
+def clamp_array(arr: np.ndarray, lb: int | float, ub: int | float) -> np.ndarray:
+    """
+    Clamp every element of `arr` into [lb, ub] in place and return it.
+    """
+    import numpy as np
+
+    return np.clip(arr, lb, ub, out=arr)
+
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def image_size(path: Path) -> tuple[int, int]:
+    """
+    Width and height of an image, read from the IHDR chunk for PNGs.
+    """
+    with open(path, "rb") as f:
+        header = f.read(24)
+    if header[:8] == _PNG_SIGNATURE and header[12:16] == b"IHDR":
+        return struct.unpack(">II", header[16:24])
+
+    from PIL import Image
+
+    with Image.open(path) as img:
+        return img.size
@@ -1,16 +1,53 @@
 from __future__ import annotations
 
 import json
+import os
 import unittest
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import cache, cached_property
 from typing import IO
 
-import cattrs
-
 from ...common.geometry import Rect
-from ...common.lazyproperty import lazyproperty
 from ...common.settings import get_settings
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _quad_to_rect(points: list[dict[str, int]]) -> Rect:
+    """
+    Map a bounding quadrilateral to its axis-aligned bounding Rect.
+    """
+    ul, ur, lr, ll = points
+    xs = (ul["x"], ur["x"], lr["x"], ll["x"])
+    ys = (ul["y"], ur["y"], lr["y"], ll["y"])
+    return Rect(min(xs), min(ys), max(xs), max(ys))
+
+
+@cache
+def _get_cv2():
+    """
+    Import cv2 on first use; only the dump path needs it.
+    """
+    try:
+        import cv2
+    except ImportError as e:
+        raise RuntimeError("opencv-python is required to dump OCR results") from e
+    return cv2
+
+
+def _box_polygons(boxes):
+    """
+    Map an (N, 4) array of x0, y0, x1, y1 boxes to (N, 4, 2) corner polygons.
+    """
+    return boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+
 
 @dataclass
 class Word:
@@ -28,6 +65,9 @@ class Word:
 
     @rect.setter
     def rect(self, rect: Rect):
+        """
+        Replace the word rect; call `Page.invalidate_geometry` afterwards.
+        """
         self.boundingPolygon = rect
 
 
@@ -47,6 +87,9 @@ class Line:
 
     @rect.setter
     def rect(self, rect: Rect):
+        """
+        Replace the line rect; call `Page.invalidate_geometry` afterwards.
+        """
         self.boundingPolygon = rect
 
 
@@ -59,81 +102,147 @@ class Page:
     lines: list[Line]
 
     @classmethod
-    def load(cls, f: IO[str]) -> list[Page]:
+    def load(cls, f: IO[str] | IO[bytes]) -> list[Page]:
         """
-        Load OCR result from a JSON file.
+        Load OCR result from a JSON file; binary files skip text decoding.
         """
         return cls.loads(f.read())
 
     @classmethod
-    def loads(cls, s: str) -> list[Page]:
+    def loads(cls, s: str | bytes) -> list[Page]:
         """
-        Load OCR result from a JSON string.
+        Load OCR result from a JSON string, using orjson when available.
         """
-        converter = cattrs.Converter()
+        pages = []
+        for page in _json_loads(s):
+            lines = []
+            for line in page["lines"]:
+                words = [
+                    Word(
+                        text=word["text"],
+                        boundingPolygon=_quad_to_rect(word["boundingPolygon"]),
+                        confidence=word["confidence"],
+                    )
+                    for word in line["words"]
+                ]
+                lines.append(
+                    Line(
+                        text=line["text"],
+                        boundingPolygon=_quad_to_rect(line["boundingPolygon"]),
+                        words=words,
+                    )
+                )
+            pages.append(cls(lines=lines))
+        return pages
 
-        def map_quad_to_rect(points: list[dict[str, int]], cls: type[Rect]):
-            ul, ur, lr, ll = points
-            x0 = min(ul["x"], ur["x"], lr["x"], ll["x"])
-            y0 = min(ul["y"], ur["y"], lr["y"], ll["y"])
-            x1 = max(ul["x"], ur["x"], lr["x"], ll["x"])
-            y1 = max(ul["y"], ur["y"], lr["y"], ll["y"])
-            return cls(x0, y0, x1, y1)
+    @classmethod
+    def dump_pages(cls, pages: list[Page]):
+        """
+        Dump several pages concurrently; cv2 releases the GIL while reading,
+        drawing and writing the images.
+        """
+        if get_settings().dump is None:
+            return
+        if len(pages) <= 1:
+            for page in pages:
+                page.dump()
+            return
 
-        converter.register_structure_hook(Rect, map_quad_to_rect)
-        return converter.structure(json.loads(s), list[Page])
+        suffixes = [f".{i}" for i in range(1, len(pages) + 1)]
+        with ThreadPoolExecutor(max_workers=min(len(pages), os.cpu_count() or 1)) as ex:
+            list(ex.map(cls.dump, pages, suffixes))
 
-    def dump(self):
+    def dump(self, suffix: str = ""):
         settings = get_settings()
         if settings.dump is None:
             return
         if not settings.dump_ocr_word_rect and not settings.dump_ocr_line_rect:
             return
 
-        import cv2
+        import numpy as np
+
+        cv2 = _get_cv2()
 
         img = cv2.imread(str(settings.input_img_path))
-        for i, line in enumerate(self.lines, 1):
-            if settings.dump_ocr_word_rect:
-                for word in line.words:
-                    cv2.rectangle(
-                        img,
-                        tuple(word.boundingPolygon.p0),
-                        tuple(word.boundingPolygon.p1),
-                        (0, 0, 255),
-                        1,
-                    )
-            if settings.dump_ocr_line_rect:
+        if settings.dump_ocr_word_rect:
+            boxes = np.array(
+                [tuple(word.boundingPolygon) for word in self.words],
+                dtype=np.int32,
+            ).reshape(-1, 4)
+            if len(boxes):
+                cv2.polylines(img, _box_polygons(boxes), True, (0, 0, 255), 1)
+        if settings.dump_ocr_line_rect:
+            for i, line in enumerate(self.lines, 1):
                 cv2.putText(
                     img,
                     f"{i}",
-                    tuple(line.boundingPolygon.p0),
+                    line.boundingPolygon.p0.as_tuple,
                     cv2.FONT_HERSHEY_SIMPLEX,
                     1,
                     (0, 0, 255),
                     2,
                 )
-                cv2.rectangle(
-                    img,
-                    tuple(line.boundingPolygon.p0),
-                    tuple(line.boundingPolygon.p1),
-                    (255, 0, 0),
-                    1,
-                )
+            boxes = np.array(self.line_coords, dtype=np.int32).T.reshape(-1, 4)
+            if len(boxes):
+                cv2.polylines(img, _box_polygons(boxes), True, (255, 0, 0), 1)
 
         settings.dump.mkdir(parents=True, exist_ok=True)
         stem = settings.input_img_path.stem
-        dump_path = settings.dump / f"{stem}.ocr.png"
+        dump_path = settings.dump / f"{stem}{suffix}.ocr.png"
         cv2.imwrite(str(dump_path), img)
 
-    @lazyproperty
+    def invalidate_geometry(self):
+        """
+        Drop the cached line columns, page rect and word index. Must be called
+        after word or line rects are corrected, or queries use stale bounds.
+        """
+        for name in ("line_coords", "rect", "words", "_word_index"):
+            self.__dict__.pop(name, None)
+
+    @cached_property
+    def line_coords(self) -> tuple[tuple[int, ...], ...]:
+        """
+        Line bounding boxes as coordinate columns (x0s, y0s, x1s, y1s).
+        """
+        return tuple(zip(*(line.boundingPolygon for line in self.lines)))
+
+    @cached_property
     def rect(self) -> Rect:
-        return Rect(
-            x0=min(line.boundingPolygon.x0 for line in self.lines),
-            y0=min(line.boundingPolygon.y0 for line in self.lines),
-            x1=max(line.boundingPolygon.x1 for line in self.lines),
-            y1=max(line.boundingPolygon.y1 for line in self.lines),
+        x0s, y0s, x1s, y1s = self.line_coords
+        return Rect(x0=min(x0s), y0=min(y0s), x1=max(x1s), y1=max(y1s))
+
+    @cached_property
+    def words(self) -> list[Word]:
+        """
+        All words of the page in reading order.
+        """
+        return [word for line in self.lines for word in line.words]
+
+    @cached_property
+    def _word_index(self) -> tuple[list[int], list[int], int]:
+        """
+        Word indices sorted by x0, their x0 values and the widest word width.
+        Snapshot of the word rects, see `invalidate_geometry`.
+        """
+        rects = [word.boundingPolygon for word in self.words]
+        order = sorted(range(len(rects)), key=lambda i: rects[i].x0)
+        x0s = [rects[i].x0 for i in order]
+        max_w = max((rect.w for rect in rects), default=0)
+        return order, x0s, max_w
+
+    def query_words_intersecting(self, rect: Rect) -> list[Word]:
+        """
+        Words whose bounding box intersects `rect`, in reading order.
+        """
+        order, x0s, max_w = self._word_index
+        # a word can only reach rect if rect.x0 - max_w < word.x0 < rect.x1
+        lo = bisect_right(x0s, rect.x0 - max_w)
+        hi = bisect_left(x0s, rect.x1)
+        words = self.words
+        hits = sorted(
+            i for i in order[lo:hi] if words[i].boundingPolygon.intersects(rect)
         )
+        return [words[i] for i in hits]
 
     def __repr__(self) -> str:
         return f"Page(lines={len(self.lines)}, rect={self.rect})"
@@ -150,3 +259,54 @@ class TestOCRPage(unittest.TestCase):
             s = f.read()
         ocr_pages = Page.loads(s)
         self.assertEqual(len(ocr_pages), 1)
+
+    @staticmethod
+    def _quad(x0: int, y0: int, x1: int, y1: int) -> list[dict[str, int]]:
+        return [
+            {"x": x0, "y": y0},
+            {"x": x1, "y": y0},
+            {"x": x1, "y": y1},
+            {"x": x0, "y": y1},
+        ]
+
+    def test_query_words_intersecting(self):
+        def word(text, x0, y0, x1, y1):
+            return {
+                "text": text,
+                "boundingPolygon": self._quad(x0, y0, x1, y1),
+                "confidence": 1.0,
+            }
+
+        # reading order differs from x0 order: "right" comes first
+        lines = [
+            {
+                "text": "right touch",
+                "boundingPolygon": self._quad(80, 0, 110, 10),
+                "words": [
+                    word("right", 80, 0, 90, 10),
+                    word("touch", 100, 0, 110, 10),
+                ],
+            },
+            {
+                "text": "wide left mid",
+                "boundingPolygon": self._quad(0, 20, 70, 30),
+                "words": [
+                    word("wide", 0, 20, 50, 30),
+                    word("left", 0, 20, 5, 30),
+                    word("mid", 60, 20, 70, 30),
+                ],
+            },
+        ]
+        page = Page.loads(json.dumps([{"lines": lines}]))[0]
+
+        words = page.query_words_intersecting(Rect(40, 0, 100, 30))
+        # "wide" starts left of rect.x0, "touch" only touches rect.x1
+        self.assertEqual([w.text for w in words], ["right", "wide", "mid"])
+
+        self.assertEqual(page.query_words_intersecting(Rect(200, 0, 300, 30)), [])
+
+        # a corrected rect is only seen once the index is rebuilt
+        page.lines[0].words[1].rect = Rect(200, 0, 210, 10)
+        page.invalidate_geometry()
+        words = page.query_words_intersecting(Rect(200, 0, 300, 30))
+        self.assertEqual([w.text for w in words], ["touch"])
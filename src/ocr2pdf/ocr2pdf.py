@@ -1,36 +1,89 @@
 import argparse
+import array
+import functools
+import json
+import os
+import tempfile
 import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 import fontmod
 
-from PIL import Image
 import pypdf
 from pypdf import mupdf
 
 from ocr2pdf.common import settings
+from ocr2pdf.common.utils import image_size
 from ocr2pdf.ocr.ms.page import Page as OCRPage
 
 
 _format_g = pypdf.format_g
+# 行高取整数像素，字号的取值很少，缓存其格式化结果
+_format_fontsize = functools.lru_cache(maxsize=256)(_format_g)
+
+_CONTENT_TEMPLATE = (
+    "\nq\n{bdc}{alpha}BT\n{cm}1 0 0 1 {tm} Tm /{fname} {fs} Tf "
+    "{tr}{tc}{color}{fill}{tj}TJ\nET\n{emc}Q\n"
+)
 
 font_ctx = fontmod.FontContext()
 
+# codepoint -> font picked by font_ctx.fallback for that character alone
+_glyph_font_cache: dict = {}
+# font -> codepoints the font is known to cover, filled in as fonts are probed
+_font_coverage: dict = {}
 
-def pick_font(text: str):
+
+def _glyph_font(cp: int):
+    try:
+        return _glyph_font_cache[cp]
+    except KeyError:
+        font = _glyph_font_cache[cp] = font_ctx.fallback(chr(cp), False)
+        if font is not None:
+            _font_coverage.setdefault(font, set()).add(cp)
+        return font
+
+
+@functools.lru_cache(maxsize=4096)
+def _pick_font_by_codepoints(cps: frozenset[int]):
     font = None
-    for c in text:
+    coverage = ()
+    for cp in sorted(cps):
+        if cp in coverage:
+            # the current font is already known to cover cp, it would be kept
+            continue
+        glyph_font = _glyph_font(cp)
         if font is None:
-            font = font_ctx.fallback(c, False)
-        else:
-            font = font_ctx.fallback_with_default(c, False, font)
+            font = glyph_font
+        elif glyph_font != font:
+            # the current font is kept if it covers cp, otherwise replaced
+            font = font_ctx.fallback_with_default(chr(cp), False, font)
+            # 没有字体支持 cp 时返回的是传入的默认字体，不能记为已覆盖
+            if font is not None and glyph_font is not None:
+                _font_coverage.setdefault(font, set()).add(cp)
+        coverage = _font_coverage.get(font, ())
     return font
 
 
+def pick_font(text: str):
+    cps = frozenset(map(ord, text))
+    for font, coverage in _font_coverage.items():
+        if cps <= coverage:
+            return font
+    return _pick_font_by_codepoints(cps)
+
+
 def escapt_font_name(name: str) -> str:
     return name.replace(" ", "_")
 
 
+@functools.lru_cache(maxsize=4096)
 def auto_detect_font(text: str) -> tuple[str, str]:
+    if text.isascii():
+        return "helv", None
+
     font = pick_font(text)
 
     if font is None:
@@ -40,6 +93,117 @@ def auto_detect_font(text: str) -> tuple[str, str]:
     return name, file
 
 
+@dataclass
+class _FontEntry:
+    """
+    Font xref and metrics of a font inserted into a document.
+    """
+
+    xref: int
+    ordering: int
+    simple: bool
+    bfname: str
+    ascender: float
+    descender: float
+    glyphs: list | None
+    pages: set[int] = field(default_factory=set)  # xrefs of pages using the font
+    widths: array.array | None = field(init=False, default=None)
+    tj_glyphs: list | None = field(init=False, default=None)  # glyphs for getTJstr
+
+    def __post_init__(self):
+        self.set_glyphs(self.glyphs)
+
+    def set_glyphs(self, glyphs: list | None):
+        """Store the glyph table and the per-codepoint data derived from it."""
+        self.glyphs = glyphs
+        if glyphs is None:
+            self.widths = None
+        else:
+            self.widths = array.array("d", [g[1] for g in glyphs])
+        if self.simple and self.bfname not in ("Symbol", "ZapfDingbats"):
+            self.tj_glyphs = None
+        else:
+            self.tj_glyphs = glyphs
+
+
+def _doc_cache(doc: pypdf.Document, name: str) -> dict:
+    """
+    Per-document cache dict stored on the document itself. Document has a
+    __dict__ slot but no __weakref__, so it cannot key a WeakKeyDictionary.
+    """
+    return vars(doc).setdefault(name, {})
+
+
+def _load_font_entry(doc: pypdf.Document, xref: int) -> _FontEntry:
+    fontdict = pypdf.CheckFontInfo(doc, xref)[1]
+    return _FontEntry(
+        xref=xref,
+        ordering=fontdict["ordering"],
+        simple=fontdict["simple"],
+        bfname=fontdict["name"],
+        ascender=fontdict["ascender"],
+        descender=fontdict["descender"],
+        glyphs=fontdict["glyphs"],
+    )
+
+
+def _get_font_by_xref(doc: pypdf.Document, xref: int) -> _FontEntry:
+    """Metrics of a font already inserted into the document, loaded once."""
+    # {font xref: _FontEntry}
+    fonts = _doc_cache(doc, "_ocr2pdf_font_xrefs")
+    entry = fonts.get(xref)
+    if entry is None:
+        entry = fonts[xref] = _load_font_entry(doc, xref)
+    return entry
+
+
+def _get_or_load_font(
+    page: pypdf.Page,
+    fontname: str,
+    fontfile: str | None,
+    encoding: int,
+    set_simple: int,
+) -> _FontEntry:
+    """Insert a font into the page once and load its metrics once per document."""
+    # {(fontname, fontfile, encoding, set_simple): _FontEntry}
+    fonts = _doc_cache(page.parent, "_ocr2pdf_fonts")
+    key = (fontname, fontfile, encoding, set_simple)
+    entry = fonts.get(key)
+    if entry is not None and page.xref in entry.pages:
+        return entry
+
+    xref = page.insert_font(
+        fontname=fontname, fontfile=fontfile, encoding=encoding, set_simple=set_simple
+    )
+    if entry is None:
+        entry = fonts[key] = _get_font_by_xref(page.parent, xref)
+    entry.pages.add(page.xref)
+    return entry
+
+
+@functools.lru_cache(maxsize=256)
+def _color_code_cached(color: tuple | float | None, which: str) -> str:
+    return pypdf.ColorCode(color, which)
+
+
+def _color_code(color, which: str) -> str:
+    if isinstance(color, list):
+        color = tuple(color)
+    return _color_code_cached(color, which)
+
+
+def _opacity_cached(page: pypdf.Page, CA: float, ca: float) -> str:
+    """Graphics state operator for the opacities, registered once per page."""
+    # {(page xref, CA, ca): graphics state operator}
+    opacities = _doc_cache(page.parent, "_ocr2pdf_opacities")
+    key = (page.xref, CA, ca)
+    alpha = opacities.get(key)
+    if alpha is None:
+        gstate = page._set_opacity(CA=CA, ca=ca)
+        alpha = opacities[key] = "" if gstate is None else "/%s gs\n" % gstate
+    return alpha
+
+
 def shape_insert_single_line_text(
     self,
     rect: tuple,
@@ -59,6 +223,7 @@ def shape_insert_single_line_text(
     stroke_opacity: float = 1,
     fill_opacity: float = 1,
     oc: int = 0,
+    precomputed_xref: int | None = None,
 ) -> dict:
     """Insert a single line of text into a rectangle with adaptive character spacing.
 
@@ -79,17 +244,19 @@ def shape_insert_single_line_text(
         stroke_opacity -- stroke opacity (0-1)
         fill_opacity -- fill opacity (0-1)
         oc -- optional content reference
+        precomputed_xref -- xref of fontname already inserted into the page
         min_char_spacing -- minimum character spacing (negative values make text tighter)
     Returns:
         dict with keys: 'success' (bool), 'char_spacing' (float), 'text_width' (float), 'rect_width' (float)
     """
-    rect = pypdf.Rect(rect)
+    if not isinstance(rect, pypdf.Rect):
+        rect = pypdf.Rect(rect)
     if rect.is_empty or rect.is_infinite:
         raise ValueError("text box must be finite and not empty")
 
     # 将多行文本转换为单行（替换换行符为空格）
     text = str(text).replace("\n", " ").replace("\r", " ")
-    if not text.strip():
+    if not text or text.isspace():
         return {
             "success": False,
             "char_spacing": 0,
@@ -98,11 +265,11 @@ def shape_insert_single_line_text(
         }
 
     # 颜色处理
-    color_str = pypdf.ColorCode(color, "c")
-    fill_str = pypdf.ColorCode(fill, "f")
+    color_str = _color_code(color, "c")
+    fill_str = _color_code(fill, "f")
     if fill is None and render_mode == 0:  # ensure fill color for 0 Tr
         fill = color
-        fill_str = pypdf.ColorCode(color, "f")
+        fill_str = _color_code(color, "f")
 
     # 可选内容处理
     optcont = self.page._get_optional_content(oc)
@@ -113,20 +280,13 @@ def shape_insert_single_line_text(
         bdc = emc = ""
 
     # 透明度处理
-    alpha = self.page._set_opacity(CA=stroke_opacity, ca=fill_opacity)
-    if alpha is None:
-        alpha = ""
-    else:
-        alpha = "/%s gs\n" % alpha
+    alpha = _opacity_cached(self.page, stroke_opacity, fill_opacity)
 
     # 旋转角度验证
     if rotate % 90 != 0:
         raise ValueError("rotate must be multiple of 90")
 
-    rot = rotate
-    while rot < 0:
-        rot += 360
-    rot = rot % 360
+    rot = rotate % 360  # % 已将负角度归一化到 [0, 360)
 
     # 旋转变换矩阵
     cmp90 = "0 1 -1 0 0 0 cm\n"  # rotates counter-clockwise
@@ -146,52 +306,37 @@ def shape_insert_single_line_text(
         xref = mupdf.pdf_to_num(font_obj)
         fontdict = {}  # TODO:
         self.doc.get_char_widths(xref, fontdict=fontdict)
+        font_entry = _load_font_entry(self.doc, xref)
+    elif precomputed_xref is not None:
+        font_entry = _get_font_by_xref(self.doc, precomputed_xref)
     else:
-        xref = self.page.insert_font(
-            fontname=fname, fontfile=fontfile, encoding=encoding, set_simple=set_simple
-        )
+        font_entry = _get_or_load_font(self.page, fname, fontfile, encoding, set_simple)
 
-    fontinfo = pypdf.CheckFontInfo(self.doc, xref)
-
-    fontdict = fontinfo[1]
-    ordering = fontdict["ordering"]
-    simple = fontdict["simple"]
-    glyphs = fontdict["glyphs"]
-    bfname = fontdict["name"]
-    ascender = fontdict["ascender"]
-    descender = fontdict["descender"]
+    xref = font_entry.xref
+    ordering = font_entry.ordering
+    simple = font_entry.simple
+    ascender = font_entry.ascender
+    descender = font_entry.descender
 
     # 处理字符编码限制
-    maxcode = max([ord(c) for c in text])
+    maxcode = ord(max(text))
     if simple and maxcode > 255:
         text = "".join([c if ord(c) < 256 else "?" for c in text])
 
-    # 获取字符宽度信息
-    glyphs = self.doc.get_char_widths(xref, maxcode + 1)
-    if simple and bfname not in ("Symbol", "ZapfDingbats"):
-        tj_glyphs = None
-    else:
-        tj_glyphs = glyphs
+    # 获取字符宽度信息（按需扩展缓存的字宽表）
+    glyphs = font_entry.glyphs
+    if ordering < 0 and (glyphs is None or len(glyphs) <= maxcode):
+        font_entry.set_glyphs(self.doc.get_char_widths(xref, maxcode + 1))
+    widths = font_entry.widths
+    tj_glyphs = font_entry.tj_glyphs
 
     # 计算文本像素长度的函数
-    def pixlen(x, char_spacing=0):
-        """计算字符串的像素长度，包含字符间距"""
+    def pixlen(x):
+        """计算字符串的像素长度（不含字符间距）"""
         if ordering < 0:
-            base_width = sum([glyphs[ord(c)][1] for c in x]) * fontsize
-            # 字符间距 = (字符数 - 1) * char_spacing * fontsize
-            spacing_width = (len(x) - 1) * char_spacing * fontsize if len(x) > 1 else 0
-            return base_width + spacing_width
+            return sum(map(widths.__getitem__, map(ord, x))) * fontsize
         else:
-            base_width = len(x) * fontsize
-            spacing_width = (len(x) - 1) * char_spacing * fontsize if len(x) > 1 else 0
-            return base_width + spacing_width
-
-    # def pixlen(x):
-    #     """Calculate pixel length of x."""
-    #     if ordering < 0:
-    #         return sum([glyphs[ord(c)][1] for c in x]) * fontsize
-    #     else:
-    #         return len(x) * fontsize
+            return len(x) * fontsize
 
     # 形变处理
     if pypdf.CheckMorph(morph):
@@ -203,20 +348,21 @@ def shape_insert_single_line_text(
     else:
         cm = ""
 
-    # 根据旋转调整坐标和可用宽度
+    # 根据旋转调整坐标和可用宽度（直接由矩形坐标构造起点）
+    asc = fontsize * ascender
     if rot == 0:  # normal orientation
-        point = rect.tl + pypdf.Point(0, fontsize * ascender)
+        point = pypdf.Point(rect.x0, rect.y0 + asc)
         maxwidth = rect.width
     elif rot == 90:  # rotate counter clockwise
-        point = rect.bl + pypdf.Point(fontsize * ascender, 0)
+        point = pypdf.Point(rect.x0 + asc, rect.y1)
         maxwidth = rect.height
         cm += cmp90
     elif rot == 180:  # text upside down
-        point = rect.br + pypdf.Point(0, -fontsize * ascender)
+        point = pypdf.Point(rect.x1, rect.y1 - asc)
         maxwidth = rect.width
         cm += cm180
     else:  # rotate clockwise (270 or -90)
-        point = rect.tr + pypdf.Point(-fontsize * ascender, 0)
+        point = pypdf.Point(rect.x1 - asc, rect.y0)
         maxwidth = rect.height
         cm += cmm90
 
@@ -229,8 +375,11 @@ def shape_insert_single_line_text(
         dw = maxwidth - base_text_width
         char_spacing = dw / (len(text) - 1)
 
-    # 重新计算实际文本宽度
-    actual_text_width = pixlen(text, char_spacing)
+    # 实际文本宽度 = 基础宽度 + (字符数 - 1) * char_spacing * fontsize
+    if len(text) > 1:
+        actual_text_width = base_text_width + (len(text) - 1) * char_spacing * fontsize
+    else:
+        actual_text_width = base_text_width
 
     # # 根据对齐方式调整起始位置
     # if align == 1:  # center
@@ -266,26 +415,24 @@ def shape_insert_single_line_text(
         top = height - point.y - self.y
 
     # 生成PDF内容流
-    nres = "\nq\n%s%sBT\n" % (bdc, alpha) + cm
-    nres += f"1 0 0 1 {_format_g((left, top))} Tm /{fname} {_format_g(fontsize)} Tf "
-
-    # 设置渲染模式
-    if render_mode > 0:
-        nres += "%i Tr " % render_mode
-
-    # 设置字符间距（如果需要）
-    if abs(char_spacing) > 1e-6:  # 只有当字符间距显著时才设置
-        nres += _format_g(char_spacing) + " Tc "
-
-    # 设置颜色
-    if color is not None:
-        nres += color_str
-    if fill is not None:
-        nres += fill_str
-
-    # 输出文本
-    nres += "%sTJ\n" % pypdf.getTJstr(text, tj_glyphs, simple, ordering)
-    nres += "ET\n%sQ\n" % emc
+    nres = _CONTENT_TEMPLATE.format(
+        bdc=bdc,
+        alpha=alpha,
+        cm=cm,
+        tm=_format_g((left, top)),
+        fname=fname,
+        fs=_format_fontsize(fontsize),
+        # 设置渲染模式
+        tr="%i Tr " % render_mode if render_mode > 0 else "",
+        # 设置字符间距（只有当字符间距显著时才设置）
+        tc=_format_g(char_spacing) + " Tc " if abs(char_spacing) > 1e-6 else "",
+        # 设置颜色
+        color=color_str if color is not None else "",
+        fill=fill_str if fill is not None else "",
+        # 输出文本
+        tj=pypdf.getTJstr(text, tj_glyphs, simple, ordering),
+        emc=emc,
+    )
 
     # 更新形状内容
     self.text_cont += nres
@@ -326,6 +473,7 @@ def insert_single_line_text(
     fill_opacity: float = 1,
     oc: int = 0,
     overlay: bool = True,
+    precomputed_xref: int | None = None,
 ) -> float:
     """Insert single line text into a given rectangle.
 
@@ -344,6 +492,7 @@ def insert_single_line_text(
         rotate: 0, 90, 180, or 270 degrees
         morph: morph box with a matrix and a fixpoint
         overlay: put text in foreground or background
+        precomputed_xref: xref of fontname already inserted into the page
     Returns:
         unused or deficit rectangle area (float)
     """
@@ -365,6 +514,7 @@ def insert_single_line_text(
         stroke_opacity=stroke_opacity,
         fill_opacity=fill_opacity,
         oc=oc,
+        precomputed_xref=precomputed_xref,
     )
     if rc["success"]:
         img.commit(overlay)
@@ -375,124 +525,168 @@ pypdf.utils.Shape.insert_single_line_text = shape_insert_single_line_text
 pypdf.utils.insert_single_line_text = insert_single_line_text
 
 
-def ocr2pdf(img_paths: list[Path], pdf_path: Path):
+def _process_image(doc: pypdf.Document, img_path: Path) -> bool:
+    """
+    把一张图片的 OCR 结果写入 doc 的新页面，OCR 文件不存在时返回 False
+    """
+    ocr_path = img_path.with_suffix(".ms.json")
+
+    # OCR结果加载计时
+    ocr_load_start = time.perf_counter()
+    try:
+        with open(ocr_path, "rb") as f:
+            ocr_pages = OCRPage.load(f)
+    except FileNotFoundError:
+        print(f"  跳过 - OCR文件不存在: {ocr_path.name}")
+        return False
+
+    settings.init_settings(
+        input_img_path=img_path,
+        output_img_path=img_path.with_suffix(".unused.png"),
+    )
+
+    ocr_load_time = time.perf_counter() - ocr_load_start
+    print(f"  OCR数据加载耗时: {ocr_load_time:.3f}秒")
+
+    # OCR处理计时
+    ocr_process_start = time.perf_counter()
+    OCRPage.dump_pages(ocr_pages)
+
+    editor_pages = ocr_pages  # [Page(p) for p in ocr_pages]
+    # for page in editor_pages:
+    #     page.correct_rect()
+
+    width, height = image_size(settings.get_settings().input_img_path)
+    ocr_process_time = time.perf_counter() - ocr_process_start
+    print(f"  OCR数据处理耗时: {ocr_process_time:.3f}秒")
+
+    # PDF生成计时
+    pdf_gen_start = time.perf_counter()
+    for editor_page in editor_pages:
+        page = pypdf.utils.new_page(
+            doc=doc,
+            pno=-1,
+            width=width,
+            height=height,
+        )
+
+        # page.insert_font(fontname="msyh", fontfile=fontfile)
+        # word_count = 0
+
+        # 先确定每行的文本和字体，每种字体在页面上只插入一次
+        line_fonts = []
+        for line in editor_page.lines:
+            # 多字符的词前加空格
+            parts = [line.words[0].text]
+            parts.extend(
+                " " + word.text if len(word.text) > 1 else word.text
+                for word in line.words[1:]
+            )
+            text = "".join(parts)
+            line_fonts.append((line, text, auto_detect_font(text)))
+
+        font_xrefs = {}
+        for _, _, font in line_fonts:
+            if font not in font_xrefs:
+                font_name, font_file = font
+                font_entry = _get_or_load_font(page, font_name, font_file, 0, 0)
+                font_xrefs[font] = font_entry.xref
+
+        for line, text, font in line_fonts:
+            pypdf.utils.insert_single_line_text(
+                page=page,
+                rect=tuple(line.rect),
+                text=text,
+                fontname=font[0],
+                fontfile=font[1],
+                fontsize=line.rect.h / 1.32,
+                align=pypdf.TEXT_ALIGN_JUSTIFY,
+                precomputed_xref=font_xrefs[font],
+            )
+
+            # pypdf.utils.draw_rect(
+            #     page=page,
+            #     rect=list(iter(line.rect)),
+            #     stroke_opacity=0.2,
+            # )
+
+            # for word in line.words:
+            #     pypdf.mupdf.fz_encode_character_with_fallback(None, word.text, 0, 0, )
+
+            #     rect = word.rect.resize(y0=line.rect.y0, y1=line.rect.y1)
+            #     pypdf.utils.insert_single_line_text(
+            #         page=page,
+            #         rect=list(iter(rect)),
+            #         text=word.text,
+            #         fontname="msyh",
+            #         fontsize=word.rect.h / 1.32,
+            #     )
+
+            #     pypdf.utils.draw_rect(
+            #         page=page,
+            #         rect=list(iter(rect)),
+            #         stroke_opacity=0.2,
+            #     )
+
+            #     pypdf.utils.insert_text(
+            #         page=page,
+            #         point=(word.rect.x0, word.rect.y0),
+            #         text=word.text,
+            #         fontsize=word.rect.h * 0.8,
+            #         fontname="msyh",
+            #     )
+
+            #     word_count += 1
+            #     print(
+            #         f"insert origin={word.rect.p0}, size={word.rect.h * 0.8:2.2f}, text={word.text}"
+            #     )
+
+        # print(f"  插入了 {word_count} 个文字")
+
+    pdf_gen_time = time.perf_counter() - pdf_gen_start
+    print(f"  PDF生成耗时: {pdf_gen_time:.3f}秒")
+    return True
+
+
+def _build_image_pdf(img_path: Path) -> bytes | None:
+    """
+    在子进程中把一张图片单独生成 PDF，返回其字节，没有页面时返回 None
+    """
+    with pypdf.open() as doc:
+        if not _process_image(doc, img_path) or doc.page_count == 0:
+            return None
+        return doc.tobytes()
+
+
+def ocr2pdf(img_paths: list[Path], pdf_path: Path, jobs: int = 1):
+    """
+    jobs > 1 时用多个进程并行处理图片，0 表示每个 CPU 一个进程
+    """
     total_start = time.perf_counter()
     print(f"开始处理 {len(img_paths)} 个图片文件...")
 
+    jobs = min(jobs or os.cpu_count() or 1, len(img_paths))
     with pypdf.open() as doc:
-        for i, img_path in enumerate(img_paths, 1):
-            img_start = time.perf_counter()
-            print(f"\n[{i}/{len(img_paths)}] 处理图片: {img_path.name}")
-
-            ocr_path = img_path.with_suffix(".ms.json")
-            if not ocr_path.exists():
-                print(f"  跳过 - OCR文件不存在: {ocr_path.name}")
-                continue
-
-            # OCR结果加载计时
-            ocr_load_start = time.perf_counter()
-            settings.init_settings(
-                input_img_path=img_path,
-                output_img_path=img_path.with_suffix(".unused.png"),
-            )
+        if jobs > 1:
+            # 每个子进程生成单图 PDF，主进程按顺序合并
+            with ProcessPoolExecutor(max_workers=jobs) as ex:
+                parts = ex.map(_build_image_pdf, img_paths)
+                for i, (img_path, data) in enumerate(zip(img_paths, parts), 1):
+                    print(f"\n[{i}/{len(img_paths)}] 合并图片: {img_path.name}")
+                    if data is None:
+                        continue
+                    with pypdf.open(stream=data, filetype="pdf") as part:
+                        doc.insert_pdf(part)
+        else:
+            for i, img_path in enumerate(img_paths, 1):
+                img_start = time.perf_counter()
+                print(f"\n[{i}/{len(img_paths)}] 处理图片: {img_path.name}")
 
-            with open(ocr_path, "r", encoding="utf-8") as f:
-                ocr_pages = OCRPage.load(f)
-
-            ocr_load_time = time.perf_counter() - ocr_load_start
-            print(f"  OCR数据加载耗时: {ocr_load_time:.3f}秒")
-
-            # OCR处理计时
-            ocr_process_start = time.perf_counter()
-            for ocr_page in ocr_pages:
-                ocr_page.dump()
-
-            editor_pages = ocr_pages  # [Page(p) for p in ocr_pages]
-            # for page in editor_pages:
-            #     page.correct_rect()
-
-            with Image.open(str(settings.get_settings().input_img_path)) as img:
-                width, height = img.size
-            ocr_process_time = time.perf_counter() - ocr_process_start
-            print(f"  OCR数据处理耗时: {ocr_process_time:.3f}秒")
-
-            # PDF生成计时
-            pdf_gen_start = time.perf_counter()
-            for editor_page in editor_pages:
-                page = pypdf.utils.new_page(
-                    doc=doc,
-                    pno=-1,
-                    width=width,
-                    height=height,
-                )
+                if not _process_image(doc, img_path):
+                    continue
 
-                # page.insert_font(fontname="msyh", fontfile=fontfile)
-                # word_count = 0
-
-                for line in editor_page.lines:
-                    text = line.words[0].text
-                    for word in line.words[1:]:
-                        if len(word.text) > 1:
-                            text += " "
-                        text += word.text
-                        # word_count += 1
-
-                    font_name, font_file = auto_detect_font(text)
-                    page.insert_font(fontname=font_name, fontfile=font_file)
-
-                    pypdf.utils.insert_single_line_text(
-                        page=page,
-                        rect=list(iter(line.rect)),
-                        text=text,
-                        fontname=font_name,
-                        fontsize=line.rect.h / 1.32,
-                        align=pypdf.TEXT_ALIGN_JUSTIFY,
-                    )
-
-                    # pypdf.utils.draw_rect(
-                    #     page=page,
-                    #     rect=list(iter(line.rect)),
-                    #     stroke_opacity=0.2,
-                    # )
-
-                    # for word in line.words:
-                    #     pypdf.mupdf.fz_encode_character_with_fallback(None, word.text, 0, 0, )
-
-                    #     rect = word.rect.resize(y0=line.rect.y0, y1=line.rect.y1)
-                    #     pypdf.utils.insert_single_line_text(
-                    #         page=page,
-                    #         rect=list(iter(rect)),
-                    #         text=word.text,
-                    #         fontname="msyh",
-                    #         fontsize=word.rect.h / 1.32,
-                    #     )
-
-                    #     pypdf.utils.draw_rect(
-                    #         page=page,
-                    #         rect=list(iter(rect)),
-                    #         stroke_opacity=0.2,
-                    #     )
-
-                    #     pypdf.utils.insert_text(
-                    #         page=page,
-                    #         point=(word.rect.x0, word.rect.y0),
-                    #         text=word.text,
-                    #         fontsize=word.rect.h * 0.8,
-                    #         fontname="msyh",
-                    #     )
-
-                    #     word_count += 1
-                    #     print(
-                    #         f"insert origin={word.rect.p0}, size={word.rect.h * 0.8:2.2f}, text={word.text}"
-                    #     )
-
-                # print(f"  插入了 {word_count} 个文字")
-
-            pdf_gen_time = time.perf_counter() - pdf_gen_start
-            print(f"  PDF生成耗时: {pdf_gen_time:.3f}秒")
-
-            img_total_time = time.perf_counter() - img_start
-            print(f"  图片总耗时: {img_total_time:.3f}秒")
+                img_total_time = time.perf_counter() - img_start
+                print(f"  图片总耗时: {img_total_time:.3f}秒")
 
         if doc.page_count == 0:
             print("  没有生成PDF")
@@ -501,7 +695,8 @@ def ocr2pdf(img_paths: list[Path], pdf_path: Path):
         # PDF保存计时
         save_start = time.perf_counter()
         pdf_path.parent.mkdir(parents=True, exist_ok=True)
-        doc.save(str(pdf_path))
+        # 合并的各图 PDF 各自嵌入了字体，garbage=4 去掉重复的字体流
+        doc.save(str(pdf_path), garbage=4 if jobs > 1 else 0)
         save_time = time.perf_counter() - save_start
         print(f"\nPDF保存耗时: {save_time:.3f}秒")
 
@@ -511,6 +706,117 @@ def ocr2pdf(img_paths: list[Path], pdf_path: Path):
     return 0
 
 
+class TestPickFont(unittest.TestCase):
+    class _Font:
+        def __init__(self, name: str, first: int, last: int):
+            self.name, self.first, self.last = name, first, last
+
+        def covers(self, c: str) -> bool:
+            return self.first <= ord(c) <= self.last
+
+    class _FontContext:
+        def __init__(self, *fonts):
+            self.fonts = fonts
+
+        def fallback(self, c, bold):
+            return next((font for font in self.fonts if font.covers(c)), None)
+
+        def fallback_with_default(self, c, bold, default):
+            if default.covers(c):
+                return default
+            return self.fallback(c, bold) or default
+
+    def setUp(self):
+        global font_ctx
+        saved = font_ctx
+        self.latin = self._Font("latin", 0x00, 0x24F)
+        font_ctx = self._FontContext(self.latin, self._Font("cjk", 0x4E00, 0x9FFF))
+
+        def restore():
+            global font_ctx
+            font_ctx = saved
+            self._clear_caches()
+
+        self._clear_caches()
+        self.addCleanup(restore)
+
+    @staticmethod
+    def _clear_caches():
+        _glyph_font_cache.clear()
+        _font_coverage.clear()
+        _pick_font_by_codepoints.cache_clear()
+
+    def test_uncovered_codepoint_is_not_recorded(self):
+        self.assertIs(pick_font("a\u2603"), self.latin)
+        self.assertNotIn(0x2603, _font_coverage[self.latin])
+        # an uncovered line resolves the same regardless of earlier lines
+        self.assertIsNone(pick_font("\u2603"))
+
+
+class TestOpacity(unittest.TestCase):
+    def test_opacity_cached(self):
+        with pypdf.open() as doc:
+            page = doc.new_page()
+            alpha = _opacity_cached(page, 0.5, 0.5)
+            self.assertRegex(alpha, r"^/\S+ gs\n$")
+            self.assertIs(_opacity_cached(page, 0.5, 0.5), alpha)
+            self.assertEqual(_opacity_cached(page, 1, 1), "")
+
+
+class TestInsertSingleLineText(unittest.TestCase):
+    def test_insert_on_fresh_document(self):
+        with pypdf.open() as doc:
+            for _ in range(2):
+                page = doc.new_page()
+                rc = pypdf.utils.insert_single_line_text(
+                    page=page,
+                    rect=(10, 10, 150, 30),
+                    text="hello",
+                    fontname="helv",
+                    fontsize=12,
+                )
+                self.assertTrue(rc["success"])
+                xref = _get_or_load_font(page, "helv", None, 0, 0).xref
+                rc = pypdf.utils.insert_single_line_text(
+                    page=page,
+                    rect=(10, 40, 150, 60),
+                    text="world",
+                    fontname="helv",
+                    fontsize=12,
+                    precomputed_xref=xref,
+                )
+                self.assertTrue(rc["success"])
+                # justified text is extracted one character per line
+                self.assertEqual("".join(page.get_text().split()), "helloworld")
+
+    def test_process_image(self):
+        def quad(x0, y0, x1, y1):
+            return [
+                {"x": x0, "y": y0},
+                {"x": x1, "y": y0},
+                {"x": x1, "y": y1},
+                {"x": x0, "y": y1},
+            ]
+
+        word = {"text": "hello", "boundingPolygon": quad(10, 10, 150, 30)}
+        line = {"text": "hello", "boundingPolygon": quad(10, 10, 150, 30)}
+        line["words"] = [dict(word, confidence=1.0)]
+        # 只需要 PNG 签名和 IHDR 头就能读出图片尺寸
+        ihdr = (200).to_bytes(4, "big") + (100).to_bytes(4, "big")
+        png = b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR" + ihdr + bytes(5)
+
+        with tempfile.TemporaryDirectory() as tmp, pypdf.open() as doc:
+            img_path = Path(tmp, "page.png")
+            img_path.write_bytes(png)
+            img_path.with_suffix(".ms.json").write_text(
+                json.dumps([{"lines": [line]}]), encoding="utf-8"
+            )
+            self.assertTrue(_process_image(doc, img_path))
+            self.assertEqual(doc.page_count, 1)
+            self.assertEqual(tuple(doc[0].rect), (0, 0, 200, 100))
+            self.assertEqual("".join(doc[0].get_text().split()), "hello")
+
+
 if __name__ == "__main__":
     main_start = time.perf_counter()
 
@@ -529,14 +835,27 @@ if __name__ == "__main__":
         default=Path("output"),
         help="output .pdf",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="worker processes, 0 for one per CPU",
+    )
     args = parser.parse_args()
 
     # 文件查找计时
     file_search_start = time.perf_counter()
     if args.input.is_dir():
-        img_paths = [
-            _ for _ in args.input.rglob("*.png") if _.with_suffix(".ms.json").exists()
-        ]
+        # 每个目录只列一次，用文件名集合匹配 .png 与 .ms.json
+        img_paths = []
+        for root, _, files in os.walk(args.input):
+            names = set(files)
+            img_paths.extend(
+                Path(root, name)
+                for name in files
+                if name.endswith(".png") and f"{name[:-4]}.ms.json" in names
+            )
     elif args.input.with_suffix(".ms.json").exists():
         img_paths = [args.input]
     else:
@@ -546,7 +865,7 @@ if __name__ == "__main__":
     print(f"文件查找耗时: {file_search_time:.3f}秒")
     print(f"找到 {len(img_paths)} 个有效图片文件")
 
-    ocr2pdf(img_paths, args.output)
+    ocr2pdf(img_paths, args.output, args.jobs)
 
     main_total_time = time.perf_counter() - main_start
     print(f"\n程序总运行时间: {main_total_time:.3f}秒")